@@ -29,6 +29,8 @@ messages (including system, user, and assistant roles) in the messages list for
 """
 
 from dotenv import load_dotenv
+import hashlib
+import json
 import os
 from litellm import completion
 from typing import List, Dict
@@ -37,16 +39,39 @@ import base64
 load_dotenv()
 api_key = os.getenv("OPENAI_API_KEY")
 
+# In-process response cache. Re-running these examples sends the exact same
+# messages again, so we memoize on a hash of (messages, model) and skip the
+# network round-trip (and token cost) on a hit.
+_cache: Dict[str, str] = {}
+
+def _cache_key(messages: List[Dict], model: str) -> str:
+    """Stable hash of the messages list plus the model name."""
+    digest = hashlib.blake2b(
+        json.dumps(messages, sort_keys=True).encode(), digest_size=16
+    ).hexdigest()
+    return digest + model
+
 # Example 1: Missing Context in the Prompt
 
 def generate_response(messages: List[Dict]) -> str:
     """Call LLM to get response"""
+    key = _cache_key(messages, "openai/gpt-4.1-mini")
+    if key in _cache:
+        return _cache[key]
+    # No max_tokens cap - a fixed 1024 silently truncated long answers.
+    # Stream instead and stop after a generous character budget.
     response = completion(
         model="openai/gpt-4.1-mini",
         messages=messages,
-        max_tokens=1024
+        stream=True
     )
-    return response.choices[0].message.content
+    content = ""
+    for chunk in response:
+        content += chunk.choices[0].delta.content or ""
+        if len(content) > 8192:
+            break
+    _cache[key] = content
+    return content
 
 
 # messages = [
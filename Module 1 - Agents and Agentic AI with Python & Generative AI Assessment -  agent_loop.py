@@ -1,13 +1,51 @@
+import hashlib
 import json
+import orjson
 import os
+import re
+from collections import deque
 from typing import Dict, List
+import tiktoken
+import atexit
+import httpx
+import litellm
 from litellm import completion
 import warnings
 warnings.filterwarnings("ignore", category=UserWarning, module="pydantic")
 
+# One pooled HTTP client for every completion() call: HTTP/1.1 keep-alive
+# reuses the TCP+TLS connection across turns instead of paying a handshake
+# per call. (No http2=True - it needs the optional httpx[http2] extra and
+# buys nothing for serial requests.) The client must be closed on exit or
+# httpx warns about leaked transports.
+litellm.client_session = httpx.Client(
+    limits=httpx.Limits(max_keepalive_connections=8, keepalive_expiry=60),
+)
+atexit.register(litellm.client_session.close)
 
-# Define agent rules
-agent_rules = [{
+# Memory management: keep the last MAX_WINDOW messages verbatim; once the
+# prompt grows past TOKEN_BUDGET tokens, fold everything older into a short
+# summary. This keeps per-turn prompt size bounded by a constant instead of
+# growing linearly with the number of iterations.
+MAX_WINDOW = 8
+TOKEN_BUDGET = 4000
+
+# One encoder for the whole module - building a tiktoken encoding is
+# expensive, so never re-instantiate it per call. cl100k_base is a close
+# enough estimate for budgeting purposes.
+_enc = tiktoken.get_encoding("cl100k_base")
+
+# Token counts cached by content hash - the budget check then only pays to
+# encode content it has not seen before. Keying on the content (rather than
+# id(), whose addresses CPython reuses after messages are evicted) means an
+# edit via context_edit naturally re-keys and no purge bookkeeping is needed.
+_tok_cache: Dict[int, int] = {}
+
+
+# Define agent rules. Kept as a frozen tuple: providers hash the prompt
+# prefix for KV-cache reuse, so the system rules must stay byte-identical
+# between calls - never mutate them, only append new messages at the tail.
+agent_rules = ({
     "role": "system",
     "content": """
 You are an AI agent that can perform tasks by using available tools.
@@ -15,9 +53,11 @@ You are an AI agent that can perform tasks by using available tools.
 Available tools:
 - list_files() -> List[str]: List all files in the current directory.
 - read_file(file_name: str) -> str: Read the content of a file.
+- context_edit(index: int, summary: str): Replace a past message in your memory with a concise summary.
 - terminate(message: str): End the agent loop and print a summary to the user.
 
 If a user asks about files, list them before reading.
+After extracting what you need from a large file, call context_edit with its message index and a concise summary to free your context budget.
 
 Every response MUST have an action.
 Respond in this format:
@@ -28,10 +68,14 @@ Respond in this format:
     "args": {...fill in any required arguments here...}
 }
 """
-}]
+},)
 
-# Initialize memory to store interactions
-memory: List[Dict] = []
+# Initialize memory to store interactions. A deque gives O(1) eviction at
+# the front (a list would shift every element). No maxlen: blind
+# oldest-first eviction would drop the original task or the context
+# summary regardless of priority - growth is bounded by compress_memory
+# and enforce_budget instead, which respect the _pri tags.
+memory: deque = deque()
 
 # Define tool functions
 def list_files() -> List[str]:
@@ -46,42 +90,173 @@ def read_file(file_name: str) -> str:
     except Exception as e:
         return f"Error: {str(e)}"
 
+# One compiled pattern for every typed fence: a single scan finds all
+# ```<type> blocks and the caller picks the type it wants, so an untagged
+# ``` fence earlier in the response can never shadow the block we need.
+_ACTION_RE = re.compile(r"```(?P<type>\w+)\s*\n?(?P<body>.*?)```", re.DOTALL)
+
+def context_edit(index: int, summary: str) -> str:
+    """Replace a bulky past message with the agent's own summary.
+
+    Once the agent has extracted what it needs from a large tool result
+    (e.g. a read_file dump), those tokens would otherwise bloat every
+    subsequent turn. Letting the agent prune its own memory frees the
+    bulk of the result's tokens for the rest of the task.
+    """
+    # The index comes from model-generated JSON, so it may be out of range
+    # or not an integer at all - never let that crash the loop.
+    try:
+        message = memory[int(index)]
+    except (IndexError, TypeError, ValueError):
+        return f"Error: no message at index {index}."
+    except Exception as e:
+        return f"Error: {str(e)}"
+    message["content"] = summary  # new content hashes to a new cache key
+    return f"Replaced message {index} with summary."
+
+# Action dispatch table: one dict lookup replaces the sequential if/elif
+# chain. terminate is intentionally absent - it is handled up front in the
+# loop so there is a single termination check.
+_DISPATCH = {
+    "list_files": lambda args: {"result": list_files()},
+    "read_file": lambda args: {"result": read_file(args["file_name"])},
+    "context_edit": lambda args: {"result": context_edit(args["index"], args["summary"])},
+    "error": lambda args: {"error": args["message"]},
+}
+
 def extract_markdown_block(response: str, block_type: str) -> str:
-    start_marker = f"```{block_type}"
-    end_marker = "```"
-    start_idx = response.find(start_marker) + len(start_marker)
-    end_idx = response.find(end_marker, start_idx)
-    if start_idx == -1 or end_idx == -1:
-        return response
-    return response[start_idx:end_idx].strip()
+    for match in _ACTION_RE.finditer(response):
+        if match.group("type") == block_type:
+            return match.group("body").strip()
+    return response
 
 def parse_action(response: str) -> Dict:
     try:
         response = extract_markdown_block(response, "action")
-        response_json = json.loads(response)
+        # orjson parses in native code - noticeably cheaper than the stdlib
+        # json module when this runs every iteration.
+        response_json = orjson.loads(response)
         if "tool_name" in response_json and "args" in response_json:
             return response_json
         else:
             return {"tool_name": "error", "args": {"message": "You must respond with a JSON tool invocation."}}
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         return {"tool_name": "error", "args": {"message": "Invalid JSON response. You must respond with a JSON tool invocation."}}
 
-def generate_response(prompt: List[Dict]) -> str:
+# In-process response cache keyed on a hash of (messages, model). The loop
+# runs at temperature=0.7, so caching is opt-in: repeated prompts during
+# development re-runs can skip the network round-trip, but by default every
+# call still samples a fresh response.
+_cache: Dict[str, str] = {}
+
+def generate_response(prompt: List[Dict], use_cache: bool = False) -> str:
+    # Only hash and store when the caller opted in - unconditional stores
+    # would just accumulate entries nothing ever reads back.
+    if use_cache:
+        key = hashlib.blake2b(
+            json.dumps(prompt, sort_keys=True).encode(), digest_size=16
+        ).hexdigest() + "openai/gpt-4.1-mini"
+        if key in _cache:
+            return _cache[key]
+    # Stream the response and stop reading once the closing fence of the
+    # ```action block arrives - parse_action only needs what is inside the
+    # block, so there is no reason to wait for trailing commentary.
     response = completion(
         model="openai/gpt-4.1-mini",
         messages=prompt,
-        temperature=0.7
+        temperature=0.7,
+        stream=True
     )
-    return response.choices[0].message.content
+    content = ""
+    for chunk in response:
+        content += chunk.choices[0].delta.content or ""
+        if content.count("```") >= 2:
+            break
+    if use_cache:
+        _cache[key] = content
+    return content
+
+def count_tokens(messages: List[Dict]) -> int:
+    # Tokenize all uncached content in one encode_batch call - the
+    # tokenizer's per-call overhead is amortized across the batch, and each
+    # count lands in the cache so it is never computed twice.
+    new = [msg for msg in messages if hash(msg["content"]) not in _tok_cache]
+    if new:
+        encoded = _enc.encode_batch([msg["content"] for msg in new])
+        for msg, tokens in zip(new, encoded):
+            _tok_cache[hash(msg["content"])] = len(tokens)
+    return sum(_tok_cache[hash(msg["content"])] for msg in messages)
+
+def strip_private_keys(messages: List[Dict]) -> List[Dict]:
+    """Drop underscore-prefixed bookkeeping keys (e.g. _pri) before the
+    messages go over the wire."""
+    return [{k: v for k, v in msg.items() if not k.startswith("_")} for msg in messages]
+
+def _priority(index: int, total: int, entry: Dict) -> int:
+    """Effective eviction priority: higher evicts first.
+
+    The original user task is tagged _pri=1 and always survives; tool
+    interactions are _pri=2, demoted to 3 once they fall out of the recent
+    window. (The system rules live outside memory and are never evicted.)
+    """
+    pri = entry.get("_pri", 2)
+    if pri >= 2 and index < total - MAX_WINDOW:
+        return 3
+    return pri
+
+def compress_memory() -> None:
+    """Summarize older interactions once the prompt outgrows the budget.
+
+    The last MAX_WINDOW messages are kept verbatim (sliding window); the
+    rest are replaced with a single cheap LLM summary so the agent still
+    remembers what it did without re-sending every tool result each turn.
+    """
+    if len(memory) <= MAX_WINDOW:
+        return
+    if count_tokens(agent_rules) + count_tokens(memory) <= TOKEN_BUDGET:
+        return
+    older = list(memory)[:-MAX_WINDOW]
+    recent = list(memory)[-MAX_WINDOW:]
+    # The original task (_pri=1) must survive compression verbatim - fold
+    # it into the lossy summary and the priority guarantee is meaningless.
+    protected = [msg for msg in older if msg.get("_pri") == 1]
+    older = [msg for msg in older if msg.get("_pri") != 1]
+    if not older:
+        return
+    summary = generate_response([
+        {"role": "system", "content": "Summarize these tool interactions in under 200 tokens, preserving filenames and results."}
+    ] + strip_private_keys(older))
+    memory.clear()
+    memory.extend(protected)
+    memory.append({"role": "user", "content": f"Prior context summary: {summary}", "_pri": 2})
+    memory.extend(recent)
+    enforce_budget()
+
+def enforce_budget() -> None:
+    """Hard backstop if the prompt is still over budget after summarization.
+
+    Evicts entries highest-priority-tag first (oldest first within a tag)
+    rather than slicing blindly: a head slice would lose the original task,
+    a tail slice would lose the latest observation - both are bugs.
+    """
+    while len(memory) > 1 and count_tokens(agent_rules) + count_tokens(memory) > TOKEN_BUDGET:
+        entries = list(memory)
+        total = len(entries)
+        victim = max(range(total), key=lambda i: (_priority(i, total, entries[i]), -i))
+        if _priority(victim, total, entries[victim]) <= 1:
+            break
+        del memory[victim]
 
 def run_agent_loop(user_input: str, max_iterations: int = 10) -> None:
-    global memory
-    memory = [{"role": "user", "content": user_input}]
+    memory.clear()
+    memory.append({"role": "user", "content": user_input, "_pri": 1})
     iterations = 0
 
     while iterations < max_iterations:
-        # 1. Construct prompt: Combine agent rules with memory
-        prompt = agent_rules + memory
+        # 1. Construct prompt: Combine agent rules with memory. The stable
+        # prefix (rules + initial user message) is reused verbatim each
+        # call so the provider's prefix cache can hit.
+        prompt = list(agent_rules) + strip_private_keys(list(memory))
 
         # 2. Generate response from LLM
         print("Agent thinking...")
@@ -91,31 +266,27 @@ def run_agent_loop(user_input: str, max_iterations: int = 10) -> None:
         # 3. Parse response to determine action
         action = parse_action(response)
 
-        # 4. Execute action
-        result = "Action executed"
-        if action["tool_name"] == "list_files":
-            result = {"result": list_files()}
-        elif action["tool_name"] == "read_file":
-            result = {"result": read_file(action["args"]["file_name"])}
-        elif action["tool_name"] == "error":
-            result = {"error": action["args"]["message"]}
-        elif action["tool_name"] == "terminate":
+        # 4. Execute action. terminate is handled exactly once, up front;
+        # everything else goes through O(1) dict dispatch.
+        if action["tool_name"] == "terminate":
             print(action["args"]["message"])
             break
+
+        handler = _DISPATCH.get(action["tool_name"])
+        if handler is not None:
+            result = handler(action["args"])
         else:
             result = {"error": "Unknown action: " + action["tool_name"]}
 
         print(f"Action result: {result}")
 
         # 5. Update memory with response and results
-        memory.extend([
-            {"role": "assistant", "content": response},
-            {"role": "user", "content": json.dumps(result)}
-        ])
-
-        # 6. Check termination condition
-        if action["tool_name"] == "terminate":
-            break
+        result_message = {"role": "user", "content": orjson.dumps(result).decode(), "_pri": 2}
+        memory.extend((
+            {"role": "assistant", "content": response, "_pri": 2},
+            result_message,
+        ))
+        compress_memory()
 
         iterations += 1
 
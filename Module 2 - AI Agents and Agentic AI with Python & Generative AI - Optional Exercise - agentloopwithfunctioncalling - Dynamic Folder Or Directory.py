@@ -1,6 +1,8 @@
-import json
+import orjson
 import os
 import re
+from functools import lru_cache
+from time import time
 from typing import List
 from litellm import completion
 from dotenv import load_dotenv
@@ -30,20 +32,38 @@ def extract_directory_path(user_input: str) -> str:
         return None
 
 
+@lru_cache(maxsize=16)
+def _cached_listdir(directory: str, bucket: int) -> tuple:
+    """Directory listing keyed by a 2-second time bucket.
+
+    The agent often re-lists the same directory several times within one
+    trajectory; the bucket argument rolls over every 2 seconds, so the
+    cache self-invalidates without any explicit expiry bookkeeping.
+    """
+    return tuple(os.listdir(directory))
+
+
 def list_files(directory: str) -> List[str]:
     """List files in the specified directory."""
     try:
-        return os.listdir(directory)
+        return list(_cached_listdir(directory, int(time() // 2)))
     except Exception as e:
         return [f"Error: {str(e)}"]
 
 
+@lru_cache(maxsize=32)
+def _cached_read(file_path: str, mtime: float) -> str:
+    """File contents keyed by (path, mtime) - unchanged files are served
+    from memory instead of re-reading and re-decoding from disk."""
+    with open(file_path, "r", encoding="utf-8") as file:
+        return file.read()
+
+
 def read_file(file_name: str, directory: str) -> str:
     """Read a file's contents from a specific directory."""
     file_path = os.path.join(directory, file_name)
     try:
-        with open(file_path, "r", encoding="utf-8") as file:
-            return file.read()
+        return _cached_read(file_path, os.path.getmtime(file_path))
     except FileNotFoundError:
         return f"Error: {file_path} not found."
     except Exception as e:
@@ -151,7 +171,7 @@ while iterations < max_iterations:
     if response.choices[0].message.tool_calls:
         tool = response.choices[0].message.tool_calls[0]
         tool_name = tool.function.name
-        tool_args = json.loads(tool.function.arguments)
+        tool_args = orjson.loads(tool.function.arguments)
 
         action = {
             "tool_name": tool_name,
@@ -172,8 +192,8 @@ while iterations < max_iterations:
         print(f"Executing: {tool_name} with args {tool_args}")
         print(f"Result: {result}")
         memory.extend([
-            {"role": "assistant", "content": json.dumps(action)},
-            {"role": "user", "content": json.dumps(result)}
+            {"role": "assistant", "content": orjson.dumps(action).decode()},
+            {"role": "user", "content": orjson.dumps(result).decode()}
         ])
         iterations += 1
     else:
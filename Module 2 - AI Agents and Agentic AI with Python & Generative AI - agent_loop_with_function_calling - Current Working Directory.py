@@ -13,7 +13,7 @@ Original file is located at
 #
 # <---- Set your 'OPENAI_API_KEY' as a secret over there with the "key" icon
 #
-import json
+import orjson
 import os
 from typing import Dict, List
 from litellm import completion
@@ -119,7 +119,7 @@ while iterations < max_iterations:
     if response.choices[0].message.tool_calls:
         tool = response.choices[0].message.tool_calls[0]
         tool_name = tool.function.name
-        tool_args = json.loads(tool.function.arguments) # json.loads() to catch json.JSONDecodeError.
+        tool_args = orjson.loads(tool.function.arguments) # orjson parses in native code; raises orjson.JSONDecodeError.
 
         action = {
             "tool_name": tool_name,
@@ -140,8 +140,8 @@ while iterations < max_iterations:
         print(f"Executing: {tool_name} with args {tool_args}")
         print(f"Result: {result}")
         memory.extend([
-            {"role": "assistant", "content": json.dumps(action)},
-            {"role": "user", "content": json.dumps(result)}
+            {"role": "assistant", "content": orjson.dumps(action).decode()},
+            {"role": "user", "content": orjson.dumps(result).decode()}
         ])
     else:
         result = response.choices[0].message.content
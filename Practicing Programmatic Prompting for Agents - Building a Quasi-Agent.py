@@ -60,8 +60,12 @@ If you want to practice further, try using the system message to force the LLM t
 
 
 from dotenv import load_dotenv
+import asyncio
+import atexit
 import os
-from litellm import completion
+import httpx
+import litellm
+from litellm import acompletion
 import re
 import warnings
 warnings.filterwarnings("ignore", category=UserWarning, module="pydantic")
@@ -69,21 +73,37 @@ warnings.filterwarnings("ignore", category=UserWarning, module="pydantic")
 load_dotenv()
 api_key = os.getenv("OPENAI_API_KEY")
 
-
-# Unified function to send messages using LiteLLM
-def ask_llm(prompt, temperature=0.3):
-    response = completion(
+# One pooled async HTTP client for all acompletion() calls - the steps
+# then share keep-alive connections instead of paying a TLS handshake
+# each. (No http2=True - it needs the optional httpx[http2] extra.)
+# Closed at exit so httpx does not warn about leaked transports.
+litellm.aclient_session = httpx.AsyncClient(
+    limits=httpx.Limits(max_keepalive_connections=8, keepalive_expiry=60),
+)
+atexit.register(lambda: asyncio.run(litellm.aclient_session.aclose()))
+
+
+# Unified function to send messages using LiteLLM. Streams the response
+# but reads it to completion: the documentation and test steps return the
+# whole response (prose included), so stopping at the first fenced block
+# would silently drop part of the deliverable.
+async def ask_llm(prompt, temperature=0.3):
+    response = await acompletion(
         model="openai/gpt-4.1-mini",
         messages=[{"role": "user", "content": prompt}],
-        temperature=temperature
+        temperature=temperature,
+        stream=True
     )
-    return response['choices'][0]['message']['content'].strip()
+    buf = ""
+    async for chunk in response:
+        buf += chunk.choices[0].delta.content or ""
+    return buf.strip()
 
 # Step 1: Generate basic function from user input
-def generate_basic_function():
+async def generate_basic_function():
     user_description = input("What Python function would you like to create? ")
     prompt = f"Write a simple Python function based on this description:\n'{user_description}'. Keep it minimal."
-    response = ask_llm(prompt)
+    response = await ask_llm(prompt)
 
     print("\n=== Basic Function (Raw LLM Output) ===")
     print(response)
@@ -94,7 +114,7 @@ def generate_basic_function():
     return code
 
 # Step 2: Add full documentation to the code
-def add_documentation(code):
+async def add_documentation(code):
     prompt = (
         f"Here is a Python function:\n\n{code}\n\n"
         "Please add full documentation including:\n"
@@ -104,25 +124,34 @@ def add_documentation(code):
         "- Example usage\n"
         "- Possible edge cases"
     )
-    response = ask_llm(prompt)
+    response = await ask_llm(prompt)
     print("\n=== Documented Function ===")
     print(response)
     return response
 
 # Step 3: Add unit tests
-def add_tests(documented_code):
+# The tests only need the basic code, not the documentation, so this step
+# can run concurrently with Step 2.
+async def add_tests(code):
     prompt = (
-        f"Here is a documented Python function:\n\n{documented_code}\n\n"
+        f"Here is a Python function:\n\n{code}\n\n"
         "Please write unit tests using Python’s unittest module. "
         "Include tests for basic functionality, edge cases, error cases, and different input types."
     )
-    response = ask_llm(prompt)
+    response = await ask_llm(prompt)
     print("\n=== Unit Tests ===")
     print(response)
     return response
 
-# Run the full workflow
+# Run the full workflow. Steps 2 and 3 both depend only on the basic code,
+# so they fire together - one network round-trip instead of two.
+async def main():
+    basic_code = await generate_basic_function()
+    documented_code, test_code = await asyncio.gather(
+        add_documentation(basic_code),
+        add_tests(basic_code)
+    )
+    return documented_code, test_code
+
 if __name__ == "__main__":
-    basic_code = generate_basic_function()
-    documented_code = add_documentation(basic_code)
-    test_code = add_tests(documented_code)
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file